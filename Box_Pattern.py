@@ -1,3 +1,34 @@
+import functools
+import math
+import re
+from array import array
+from itertools import accumulate, groupby, islice
+from operator import itemgetter
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; without it the sweep kernel runs as plain Python
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that leaves the decorated function unchanged."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# A number followed by optional units, e.g. '10mm', '2.5 cm' or just '10'
+_DIM_RE = re.compile(r'([\d.]+)\s*([a-zA-Z]*)')
+
+# Accepted unit spellings mapped to their normalized unit (no unit means mm)
+_UNIT_MAP = {
+    '': 'mm', 'mm': 'mm', 'millimeter': 'mm', 'millimeters': 'mm',
+    'cm': 'cm', 'centimeter': 'cm', 'centimeters': 'cm',
+    'in': 'in', 'inch': 'in', 'inches': 'in',
+}
+
+# Millimeters per normalized unit
+_MM_PER_UNIT = {'mm': 1.0, 'cm': 10.0, 'in': 25.4}
+
+
 def convert_to_mm(value, unit):
     """
     Convert a measurement to millimeters from various units.
@@ -10,14 +41,9 @@ def convert_to_mm(value, unit):
         float: The value converted to millimeters
     """
     unit = unit.lower()
-    if unit == 'mm':
-        return value
-    elif unit == 'cm':
-        return value * 10.0
-    elif unit == 'in':
-        return value * 25.4
-    else:
+    if unit not in _MM_PER_UNIT:
         raise ValueError(f"Unsupported unit: {unit}")
+    return value * _MM_PER_UNIT[unit]
 
 
 def parse_dimension(dimension_str):
@@ -32,39 +58,34 @@ def parse_dimension(dimension_str):
     """
     dimension_str = dimension_str.strip()
 
-    # Regular expression to find a number followed by optional units
-    import re
-    match = re.match(r'([\d.]+)(\s*)([a-zA-Z]*)', dimension_str)
+    # Find a number followed by optional units
+    match = _DIM_RE.match(dimension_str)
 
     if not match:
         raise ValueError(f"Invalid dimension format: {dimension_str}")
 
     value = float(match.group(1))
-    unit = match.group(3).lower() or 'mm'  # Default to mm if no unit given
 
-    # Normalize unit
-    if unit in ['millimeter', 'millimeters', 'mm']:
-        unit = 'mm'
-    elif unit in ['centimeter', 'centimeters', 'cm']:
-        unit = 'cm'
-    elif unit in ['inch', 'inches', 'in']:
-        unit = 'in'
+    # Normalize unit (defaults to mm if no unit given)
+    unit = match.group(2).lower()
+    if unit not in _UNIT_MAP:
+        raise ValueError(f"Unsupported unit: {unit}")
+    unit = _UNIT_MAP[unit]
 
     return convert_to_mm(value, unit), unit  # !/usr/bin/env python3
 
 
-import math
-from collections import defaultdict
+# A tiny tolerance for floating point comparison
+_TOL = 1e-6
 
 
 class LineSegment:
-    def __init__(self, x1, y1, x2, y2):
-        # A tiny tolerance for floating point comparison
-        self.tolerance = 1e-6
+    __slots__ = ('x1', 'y1', 'x2', 'y2', 'is_horizontal', 'is_vertical')
 
+    def __init__(self, x1, y1, x2, y2):
         # Check if this is a horizontal or vertical line
-        self.is_horizontal = abs(y1 - y2) < self.tolerance
-        self.is_vertical = abs(x1 - x2) < self.tolerance
+        self.is_horizontal = abs(y1 - y2) < _TOL
+        self.is_vertical = abs(x1 - x2) < _TOL
 
         # Ensure the line segment is always oriented from left to right
         # or top to bottom to simplify comparison
@@ -77,321 +98,381 @@ class LineSegment:
             self.x1, self.y1 = x1, y1
             self.x2, self.y2 = x2, y2
 
-    def get_overlap(self, other):
-        """Returns the overlapping portion of two line segments, or None if they don't overlap."""
-        if not self.is_parallel_to(other):
-            return None
-
-        # For horizontal lines
-        if self.is_horizontal and other.is_horizontal and abs(self.y1 - other.y1) < self.tolerance:
-            # Find overlapping x range
-            min_x = max(self.x1, other.x1)
-            max_x = min(self.x2, other.x2)
-
-            if max_x - min_x >= -self.tolerance:  # Allow tiny negative for floating point errors
-                return LineSegment(min_x, self.y1, max_x, self.y1)
-            return None
-
-        # For vertical lines
-        elif self.is_vertical and other.is_vertical and abs(self.x1 - other.x1) < self.tolerance:
-            # Find overlapping y range
-            min_y = max(self.y1, other.y1)
-            max_y = min(self.y2, other.y2)
-
-            if max_y - min_y >= -self.tolerance:  # Allow tiny negative for floating point errors
-                return LineSegment(self.x1, min_y, self.x1, max_y)
-            return None
-
-        return None
-
-    def is_parallel_to(self, other):
-        """Check if this line is parallel to another line."""
-        if (self.is_horizontal and other.is_horizontal) or (self.is_vertical and other.is_vertical):
-            return True
-        # For diagonal lines, check if slopes are the same
-        if not self.is_horizontal and not self.is_vertical and not other.is_horizontal and not other.is_vertical:
-            # Calculate slopes
-            self_slope = (self.y2 - self.y1) / (self.x2 - self.x1) if self.x2 != self.x1 else float('inf')
-            other_slope = (other.y2 - other.y1) / (other.x2 - other.x1) if other.x2 != other.x1 else float('inf')
-            return abs(self_slope - other_slope) < self.tolerance
-        return False
-
-    def subtract(self, overlapping_segment):
-        """Returns the non-overlapping portions of this line after removing an overlapping segment."""
-        results = []
-
-        # For horizontal lines
-        if self.is_horizontal:
-            # Left segment (if exists)
-            if overlapping_segment.x1 > self.x1 + self.tolerance:
-                results.append(LineSegment(self.x1, self.y1, overlapping_segment.x1, self.y1))
-
-            # Right segment (if exists)
-            if overlapping_segment.x2 < self.x2 - self.tolerance:
-                results.append(LineSegment(overlapping_segment.x2, self.y1, self.x2, self.y1))
-
-        # For vertical lines
-        elif self.is_vertical:
-            # Top segment (if exists)
-            if overlapping_segment.y1 > self.y1 + self.tolerance:
-                results.append(LineSegment(self.x1, self.y1, self.x1, overlapping_segment.y1))
-
-            # Bottom segment (if exists)
-            if overlapping_segment.y2 < self.y2 - self.tolerance:
-                results.append(LineSegment(self.x1, overlapping_segment.y2, self.x1, self.y2))
-
-        return results
-
-    def length(self):
-        """Calculate the length of the line segment."""
-        return math.sqrt((self.x2 - self.x1) ** 2 + (self.y2 - self.y1) ** 2)
-
-    def to_svg(self, color="black", width=0.5):
-        """Convert to SVG line element."""
-        return f'<line x1="{self.x1}" y1="{self.y1}" x2="{self.x2}" y2="{self.y2}" stroke="{color}" stroke-width="{width}" />'
-
-    def __eq__(self, other):
-        """Check if two line segments are exactly the same."""
-        return (abs(self.x1 - other.x1) < self.tolerance and
-                abs(self.y1 - other.y1) < self.tolerance and
-                abs(self.x2 - other.x2) < self.tolerance and
-                abs(self.y2 - other.y2) < self.tolerance)
-
-    def __hash__(self):
-        """Hash for dictionary keys."""
-        return hash((round(self.x1, 6), round(self.y1, 6),
-                     round(self.x2, 6), round(self.y2, 6)))
+    def length_sq(self):
+        """Calculate the squared length of the line segment, for comparisons without a sqrt."""
+        dx = self.x2 - self.x1
+        dy = self.y2 - self.y1
+        return dx * dx + dy * dy
 
     def __repr__(self):
         """String representation for debugging."""
         return f"Line({self.x1},{self.y1} -> {self.x2},{self.y2})"
 
 
-def extract_rectangle_lines(x, y, width, height):
-    """Extract the four line segments that make up a rectangle."""
-    return [
-        LineSegment(x, y, x + width, y),  # Top
-        LineSegment(x + width, y, x + width, y + height),  # Right
-        LineSegment(x, y + height, x + width, y + height),  # Bottom
-        LineSegment(x, y, x, y + height)  # Left
-    ]
+# Line kinds stored in LineBuffer.kind
+KIND_HORIZONTAL = 0
+KIND_VERTICAL = 1
+KIND_DIAGONAL = 2
+
+
+class LineBuffer:
+    """Line segments stored column-wise in parallel arrays instead of one LineSegment per line."""
+    __slots__ = ('x1', 'y1', 'x2', 'y2', 'kind', 'count')
+
+    def __init__(self, capacity=0):
+        # Preallocate every column so appends write in place
+        self.x1 = array('d', bytes(8 * capacity))
+        self.y1 = array('d', bytes(8 * capacity))
+        self.x2 = array('d', bytes(8 * capacity))
+        self.y2 = array('d', bytes(8 * capacity))
+        self.kind = array('B', bytes(capacity))
+        self.count = 0
+
+    def _reserve(self, n):
+        """Make room for n more rows, growing the columns if the capacity is exceeded."""
+        missing = self.count + n - len(self.kind)
+        if missing > 0:
+            missing = max(missing, len(self.kind))  # Grow geometrically
+            for column in (self.x1, self.y1, self.x2, self.y2):
+                column.frombytes(bytes(8 * missing))
+            self.kind.frombytes(bytes(missing))
+        i = self.count
+        self.count += n
+        return i
+
+    @staticmethod
+    def _oriented(x1, y1, x2, y2):
+        """Return (kind, x1, y1, x2, y2) with the line oriented the same way LineSegment orients it."""
+        if abs(y1 - y2) < _TOL:
+            kind = KIND_HORIZONTAL
+            swap = x1 > x2
+        elif abs(x1 - x2) < _TOL:
+            kind = KIND_VERTICAL
+            swap = y1 > y2
+        else:
+            kind = KIND_DIAGONAL
+            swap = x1 > x2
+        if swap:
+            return kind, x2, y2, x1, y1
+        return kind, x1, y1, x2, y2
+
+    def append_polygon(self, points):
+        """Append the closed chain of edges through a list of (x, y) points in one batch."""
+        i = self._reserve(len(points))
+        # Pair every point with the next one, wrapping around to the first point
+        for j, ((x1, y1), (x2, y2)) in enumerate(zip(points, points[1:] + points[:1]), i):
+            self.kind[j], self.x1[j], self.y1[j], self.x2[j], self.y2[j] = self._oriented(x1, y1, x2, y2)
+
+    def append_rect(self, x, y, width, height):
+        """Append the four edges of a rectangle (top, right, bottom, left) in one write."""
+        # Normalize so every edge already runs left to right or top to bottom
+        left, right = min(x, x + width), max(x, x + width)
+        top, bottom = min(y, y + height), max(y, y + height)
+        # Zero-height sides count as horizontal, just like a LineSegment would
+        side = KIND_HORIZONTAL if bottom - top < _TOL else KIND_VERTICAL
+
+        i = self._reserve(4)
+        self.x1[i:i + 4] = array('d', (left, right, left, left))
+        self.y1[i:i + 4] = array('d', (top, top, bottom, top))
+        self.x2[i:i + 4] = array('d', (right, right, right, left))
+        self.y2[i:i + 4] = array('d', (top, bottom, bottom, bottom))
+        self.kind[i:i + 4] = array('B', (KIND_HORIZONTAL, side, KIND_HORIZONTAL, side))
+
+    def rows(self):
+        """Iterate over (kind, x1, y1, x2, y2) tuples for the stored lines."""
+        return islice(zip(self.kind, self.x1, self.y1, self.x2, self.y2), self.count)
+
+
+def extract_rectangle_lines(lines, x, y, width, height):
+    """Append the four line segments that make up a rectangle to a LineBuffer."""
+    lines.append_rect(x, y, width, height)
+
+
+def extract_polygon_lines(lines, points_str):
+    """Append the line segments of a polygon points string to a LineBuffer."""
+    # Parse the points string into coordinates in one pass over all the numbers
+    values = [float(value) for value in points_str.replace(',', ' ').split()]
+    points = list(zip(values[0::2], values[1::2]))
 
+    # Create line segments between consecutive points
+    lines.append_polygon(points)
 
-def extract_polygon_lines(points_str):
-    """Extract line segments from a polygon points string."""
-    # Parse the points string into coordinates
-    points = []
-    for point in points_str.strip().split():
-        if ',' in point:
-            x, y = point.split(',')
-            points.append((float(x), float(y)))
 
-    # Create line segments between consecutive points
-    lines = []
-    for i in range(len(points)):
-        x1, y1 = points[i]
-        x2, y2 = points[(i + 1) % len(points)]  # Wrap around to the first point
-        lines.append(LineSegment(x1, y1, x2, y2))
+@njit(cache=True, boundscheck=False)
+def _sweep_group(starts, ends, out_starts, out_ends, out_is_overlap):
+    """
+    Sweep one collinear group and write its unique and overlapping pieces to the output arrays.
+
+    Args:
+        starts: Interval start coordinates, sorted ascending
+        ends: Interval end coordinates, sorted ascending
+        out_starts, out_ends: Preallocated piece coordinates, at least 2 * len(starts) long
+        out_is_overlap: Preallocated flags, 1 where the piece is an overlap
+
+    Returns:
+        int: The number of pieces written
+    """
+    n = len(starts)
+    i = 0
+    j = 0
+    pieces = 0
+    coverage_count = 0  # Number of lines covering the span since the previous event
+    run_open = False  # Whether a piece is currently being built
+    run_start = 0.0
+    run_is_overlap = False
+    previous = 0.0
+
+    while j < n:
+        # Each interval opens at its start and closes at its end. At equal positions the
+        # closing event goes first, so lines that only touch end to end are not overlaps.
+        if i < n and starts[i] < ends[j]:
+            position = starts[i]
+            delta = 1
+            i += 1
+        else:
+            position = ends[j]
+            delta = -1
+            j += 1
+
+        if coverage_count > 0 and position - previous > _TOL:
+            # A span covered more than once is an overlap, unless it is too short to matter
+            is_overlap = coverage_count > 1 and position - previous > 0.1
+            if not run_open:
+                run_open = True
+                run_start = previous
+                run_is_overlap = is_overlap
+            elif is_overlap != run_is_overlap:
+                out_starts[pieces] = run_start
+                out_ends[pieces] = previous
+                out_is_overlap[pieces] = 1 if run_is_overlap else 0
+                pieces += 1
+                run_start = previous
+                run_is_overlap = is_overlap
+
+        coverage_count += delta
+
+        # Once nothing covers the sweep position the current piece is finished
+        if coverage_count == 0 and run_open:
+            out_starts[pieces] = run_start
+            out_ends[pieces] = position
+            out_is_overlap[pieces] = 1 if run_is_overlap else 0
+            pieces += 1
+            run_open = False
+
+        previous = position
+
+    return pieces
+
+
+def _sweep_collinear(fixed, starts, ends, axis):
+    """
+    Split a group of collinear lines into unique and overlapping pieces in one sorted sweep.
+
+    Args:
+        fixed (float): The shared y (axis 'x') or shared x (axis 'y') of the group
+        starts (list): Interval start coordinates along the axis, sorted ascending
+        ends (list): Interval end coordinates along the axis, paired with starts
+        axis (str): The coordinate the lines run along, 'x' or 'y'
+
+    Returns:
+        tuple: (unique pieces, overlapping pieces) as lists of LineSegments
+    """
+    if axis == 'x':
+        def make_segment(a, b):
+            return LineSegment(a, fixed, b, fixed)
+    else:
+        def make_segment(a, b):
+            return LineSegment(fixed, a, fixed, b)
+
+    # With the starts sorted, an interval overlaps an earlier one exactly when it starts
+    # before the furthest end reached so far. The scan stops at the first such interval;
+    # groups without any overlap pass through as-is.
+    reach = ends[0]
+    for j in range(1, len(starts)):
+        if starts[j] < reach - _TOL:
+            break
+        reach = max(reach, ends[j])
+    else:
+        return [make_segment(a, b) for a, b in zip(starts, ends)], []
+
+    # Sweep the sorted starts against the sorted ends; every event closes at most one piece
+    n = len(starts)
+    piece_starts = array('d', bytes(16 * n))
+    piece_ends = array('d', bytes(16 * n))
+    piece_is_overlap = array('B', bytes(2 * n))
+    count = _sweep_group(array('d', starts), array('d', sorted(ends)),
+                         piece_starts, piece_ends, piece_is_overlap)
 
-    return lines
+    unique_pieces = []
+    overlap_pieces = []
+    for k in range(count):
+        segment = make_segment(piece_starts[k], piece_ends[k])
+        (overlap_pieces if piece_is_overlap[k] else unique_pieces).append(segment)
+
+    return unique_pieces, overlap_pieces
+
+
+def _endpoint_key(segment):
+    """Hashable key of a segment's endpoints, rounded to 6 decimals."""
+    return (round(segment.x1, 6), round(segment.y1, 6),
+            round(segment.x2, 6), round(segment.y2, 6))
 
 
 def find_overlapping_segments(all_lines):
-    """Find all overlapping and non-overlapping line segments."""
-    # Group lines for overlap detection
-    horizontal_lines = defaultdict(list)
-    vertical_lines = defaultdict(list)
-    diagonal_lines = []
-
-    # First, categorize all lines
-    for line in all_lines:
-        if line.is_horizontal:
-            # Group by y-coordinate
-            y_key = round(line.y1, 6)
-            horizontal_lines[y_key].append(line)
-        elif line.is_vertical:
-            # Group by x-coordinate
-            x_key = round(line.x1, 6)
-            vertical_lines[x_key].append(line)
+    """Find all overlapping and non-overlapping line segments in a LineBuffer."""
+    # Flatten lines into (group key, start, end, shared coordinate) rows. A single sort
+    # then orders every group by key and every line within a group by its start.
+    horizontal_rows = []
+    vertical_rows = []
+    diag_uniques = []
+    for kind, x1, y1, x2, y2 in all_lines.rows():
+        if kind == KIND_HORIZONTAL:
+            horizontal_rows.append((round(y1, 6), x1, x2, y1))
+        elif kind == KIND_VERTICAL:
+            vertical_rows.append((round(x1, 6), y1, y2, x1))
         else:
-            diagonal_lines.append(line)
+            diag_uniques.append(LineSegment(x1, y1, x2, y2))
+    horizontal_rows.sort()
+    vertical_rows.sort()
 
     # Lists to store results
-    unique_segments = []  # Non-overlapping segments (black)
+    hv_uniques = []  # Non-overlapping horizontal and vertical segments (black)
     overlap_segments = []  # Overlapping segments (green)
 
-    # Helper to check if a segment overlaps with any in the overlap list
-    def is_duplicate_overlap(test_segment):
-        for existing_overlap in overlap_segments:
-            if (abs(test_segment.x1 - existing_overlap.x1) < test_segment.tolerance and
-                    abs(test_segment.y1 - existing_overlap.y1) < test_segment.tolerance and
-                    abs(test_segment.x2 - existing_overlap.x2) < test_segment.tolerance and
-                    abs(test_segment.y2 - existing_overlap.y2) < test_segment.tolerance):
-                return True
-        return False
-
-    # Process horizontal lines
-    for y_coord, lines in horizontal_lines.items():
-        # Sort lines by x1 coordinate
-        lines.sort(key=lambda l: l.x1)
-
-        # Find all overlaps
-        segments_to_process = lines.copy()
-        processed_segments = []
-
-        while segments_to_process:
-            current = segments_to_process.pop(0)
-            found_overlap = False
-
-            # Check for overlaps with all other unprocessed lines
-            for other in segments_to_process[:]:
-                overlap_segment = current.get_overlap(other)
-                if overlap_segment and overlap_segment.length() > 0.1:  # Ensure significant overlap
-                    found_overlap = True
-
-                    # Add the overlap to the overlaps list if it's not already there
-                    if not is_duplicate_overlap(overlap_segment):
-                        overlap_segments.append(overlap_segment)
-
-                    # Handle the current line's non-overlapping parts
-                    non_overlapping = current.subtract(overlap_segment)
-                    segments_to_process.extend(non_overlapping)
-
-                    # Handle the other line's non-overlapping parts
-                    non_overlapping_other = other.subtract(overlap_segment)
-                    segments_to_process.remove(other)
-                    segments_to_process.extend(non_overlapping_other)
-
-                    # Skip further processing of the current line
-                    break
-
-            # If no overlaps found, this is a unique segment
-            if not found_overlap:
-                processed_segments.append(current)
-
-        # Add all processed segments that have no overlaps
-        unique_segments.extend(processed_segments)
-
-    # Process vertical lines (similar logic)
-    for x_coord, lines in vertical_lines.items():
-        # Sort lines by y1 coordinate
-        lines.sort(key=lambda l: l.y1)
-
-        # Find all overlaps
-        segments_to_process = lines.copy()
-        processed_segments = []
-
-        while segments_to_process:
-            current = segments_to_process.pop(0)
-            found_overlap = False
-
-            # Check for overlaps with all other unprocessed lines
-            for other in segments_to_process[:]:
-                overlap_segment = current.get_overlap(other)
-                if overlap_segment and overlap_segment.length() > 0.1:  # Ensure significant overlap
-                    found_overlap = True
-
-                    # Add the overlap to the overlaps list if it's not already there
-                    if not is_duplicate_overlap(overlap_segment):
-                        overlap_segments.append(overlap_segment)
-
-                    # Handle the current line's non-overlapping parts
-                    non_overlapping = current.subtract(overlap_segment)
-                    segments_to_process.extend(non_overlapping)
-
-                    # Handle the other line's non-overlapping parts
-                    non_overlapping_other = other.subtract(overlap_segment)
-                    segments_to_process.remove(other)
-                    segments_to_process.extend(non_overlapping_other)
-
-                    # Skip further processing of the current line
-                    break
-
-            # If no overlaps found, this is a unique segment
-            if not found_overlap:
-                processed_segments.append(current)
-
-        # Add all processed segments that have no overlaps
-        unique_segments.extend(processed_segments)
-
-    # Add diagonal lines (since they're less likely to overlap)
-    unique_segments.extend(diagonal_lines)
+    # Process horizontal lines (intervals along x) and vertical lines (intervals along y)
+    overlap_seen = set()
+    for rows, axis in ((horizontal_rows, 'x'), (vertical_rows, 'y')):
+        for _, group in groupby(rows, key=itemgetter(0)):
+            group = list(group)
+            starts = [row[1] for row in group]
+            ends = [row[2] for row in group]
+            non_overlapping, overlapping = _sweep_collinear(group[0][3], starts, ends, axis)
+            hv_uniques.extend(non_overlapping)
+
+            # Add each overlap only once, keyed on its rounded endpoints
+            for overlap_segment in overlapping:
+                key = _endpoint_key(overlap_segment)
+                if key not in overlap_seen:
+                    overlap_seen.add(key)
+                    overlap_segments.append(overlap_segment)
 
     # Final cleanup: Ensure no segment appears in both lists
     # and filter out very short segments
     min_length = 0.1  # Minimum length to keep
+    min_length_sq = min_length * min_length
 
-    # Filter unique segments
+    # Filter unique segments. Only horizontal and vertical pieces can coincide with an
+    # overlap, so diagonal lines just need the length check. Axis-aligned pieces run left
+    # to right or top to bottom, so their length is simply the sum of the two deltas.
     filtered_unique = []
-    for segment in unique_segments:
-        if segment.length() > min_length and not is_duplicate_overlap(segment):
+    for segment in hv_uniques:
+        if (segment.x2 - segment.x1 + segment.y2 - segment.y1 > min_length and
+                _endpoint_key(segment) not in overlap_seen):
+            filtered_unique.append(segment)
+    for segment in diag_uniques:
+        if segment.length_sq() > min_length_sq:
             filtered_unique.append(segment)
 
-    # Filter overlap segments
-    filtered_overlap = []
-    for segment in overlap_segments:
-        if segment.length() > min_length:
-            # Check for duplicates in the overlap list itself
-            is_duplicate = False
-            for existing in filtered_overlap:
-                if (abs(segment.x1 - existing.x1) < segment.tolerance and
-                        abs(segment.y1 - existing.y1) < segment.tolerance and
-                        abs(segment.x2 - existing.x2) < segment.tolerance and
-                        abs(segment.y2 - existing.y2) < segment.tolerance):
-                    is_duplicate = True
-                    break
-            if not is_duplicate:
-                filtered_overlap.append(segment)
+    # Filter overlap segments (already free of duplicates thanks to overlap_seen)
+    filtered_overlap = [segment for segment in overlap_segments
+                        if segment.x2 - segment.x1 + segment.y2 - segment.y1 > min_length]
 
     return filtered_unique, filtered_overlap
 
 
-def create_connected_rectangles_svg(width, length, height, material_thickness=3, flap_length=15,
-                                    filename="connected_rectangles.svg"):
-    """
-    Creates an SVG file with 4 rectangles connected left to right, plus additional
-    rectangles above and below each one. Also adds a tapered shape to the left.
+# Templates for the emitted segments; %s formats floats exactly like str() and the f-strings did
+_PATH_SEGMENT = "M %s,%s L %s,%s"
+_GREEN_LINE = '  <line x1="%s" y1="%s" x2="%s" y2="%s" stroke="green" stroke-width="1.0" />'
 
-    Args:
-        width (float): Internal width dimension in millimeters
-        length (float): Internal length dimension in millimeters
-        height (float): Internal height dimension in millimeters (used for the middle row)
-        material_thickness (float): Material thickness in millimeters
-        flap_length (float): Length of the tapered flap in millimeters
-        filename (str): Output filename for the SVG file
+
+def _same_point(a, b):
+    """Check if two (x, y) points coincide within the tolerance."""
+    return abs(a[0] - b[0]) < _TOL and abs(a[1] - b[1]) < _TOL
+
+
+def _box_outline(column_widths, small_height, adjusted_height, material_thickness, taper_width, half_taper):
     """
-    # Adjust dimensions to account for material thickness
-    # For internal dimensions to match input, we need to add material thickness to external dimensions
-    adjusted_width = width + material_thickness
-    adjusted_length = length + material_thickness
-    adjusted_height = height + material_thickness
+    Trace the cut outline of the box pattern and list its fold lines.
 
-    # Calculate the height for the top and bottom rectangles
-    small_height = min(adjusted_width, adjusted_length, adjusted_height) / 2
+    The outline runs clockwise from the top-left corner of the tapered shape: along the top
+    of every column and its flap, down the right edge, back along the bottom and up the left
+    edge of the tapered shape. Folds are the column boundaries in the middle row and the
+    edges where each flap meets its column.
+
+    Without a tapered shape (zero flap length) the outline stays open, so the left edge of
+    the first column is only drawn as a fold. Without material thickness neighbouring flaps
+    touch, and their shared side becomes part of the column boundary fold.
 
+    Returns:
+        tuple: (outline points as (x, y) tuples, whether the outline is closed,
+                fold lines as LineSegments)
+    """
     # Calculate inset amount for top and bottom rectangles (half of material thickness)
     inset = material_thickness / 2
+    has_taper = taper_width >= _TOL
+
+    # Define the y-positions of the middle row
+    y_middle = small_height
+    y_bottom = small_height + adjusted_height
+
+    # Left edge of every column
+    column_x = list(accumulate([taper_width] + column_widths[:-1]))
+
+    top_edge = [(0, y_middle + half_taper), (taper_width, y_middle)] if has_taper else []
+    bottom_edge = [(0, y_bottom - half_taper), (taper_width, y_bottom)] if has_taper else []
+    fold_segments = []
+    for i, (x_pos, column_width) in enumerate(zip(column_x, column_widths)):
+        # The length rectangles (second and fourth) extend by material_thickness at top and bottom
+        extend = material_thickness if i == 1 or i == 3 else 0
+        top = y_middle - extend
+        bottom = y_bottom + extend
+        flap_left = x_pos + inset
+        flap_right = x_pos + column_width - inset
+
+        # Along the middle rectangle, around the top flap and on to the next column
+        top_edge += [(x_pos, top), (flap_left, top), (flap_left, top - small_height),
+                     (flap_right, top - small_height), (flap_right, top), (x_pos + column_width, top)]
+        bottom_edge += [(x_pos, bottom), (flap_left, bottom), (flap_left, bottom + small_height),
+                        (flap_right, bottom + small_height), (flap_right, bottom), (x_pos + column_width, bottom)]
+
+        # Fold where the column meets its left neighbour; flaps that touch fold there too
+        if i > 0 and inset < _TOL:
+            fold_segments.append(LineSegment(x_pos, top - small_height, x_pos, bottom + small_height))
+        else:
+            fold_segments.append(LineSegment(x_pos, y_middle, x_pos, y_bottom))
 
-    # Tapered shape dimensions
-    taper_width = flap_length  # Use the flap_length parameter (default is 15mm)
-    taper_angle = 30  # degrees
+        # Fold where the column meets each flap
+        fold_segments += [LineSegment(flap_left, top, flap_right, top),
+                          LineSegment(flap_left, bottom, flap_right, bottom)]
 
-    # Calculate the height difference for the taper (both top and bottom)
-    taper_height_diff = taper_width * math.tan(math.radians(taper_angle))
+    # Walk the bottom edge back from right to left. Points that repeat the previous one are
+    # dropped, and so are spikes that run out and straight back along the same line.
+    outline_points = []
+    for point in top_edge + bottom_edge[::-1]:
+        if outline_points and _same_point(point, outline_points[-1]):
+            continue
+        if len(outline_points) > 1 and _same_point(point, outline_points[-2]):
+            outline_points.pop()
+            continue
+        outline_points.append(point)
 
-    # Calculate total width and height of the SVG
-    total_width = 2 * adjusted_width + 2 * adjusted_length + taper_width
-    total_height = adjusted_height + 2 * small_height + 2 * material_thickness  # Increased for the shifted rectangles
+    # Leave out folds that collapse to a point, e.g. the hinge of a flap without width
+    fold_segments = [segment for segment in fold_segments if segment.length_sq() > _TOL * _TOL]
+
+    return outline_points, has_taper, fold_segments
 
-    # Define the column widths and positions
-    column_widths = [adjusted_width, adjusted_length, adjusted_width, adjusted_length]
 
-    # Define line segments for all shapes
-    all_lines = []
+def _exploded_box_lines(column_widths, small_height, adjusted_height, material_thickness, taper_width, half_taper):
+    """Collect every edge of the tapered shape and of all box rectangles in a LineBuffer."""
+    # Define line segments for all shapes: four polygon edges for the tapered shape
+    # plus four edges for each of the three rectangles in every column
+    all_lines = LineBuffer(4 + 3 * len(column_widths) * 4)
+
+    # Calculate inset amount for top and bottom rectangles (half of material thickness)
+    inset = material_thickness / 2
 
     # Line segments for the tapered shape
     tapered_y_top = small_height  # Same y as middle row
-    half_taper = taper_height_diff / 2  # Half the taper amount for top and bottom
 
     # Extract points for the tapered shape polygon
     tapered_points = f"""
@@ -400,7 +481,7 @@ def create_connected_rectangles_svg(width, length, height, material_thickness=3,
     {taper_width},{tapered_y_top + adjusted_height}
     0,{tapered_y_top + adjusted_height - half_taper}
     """
-    all_lines.extend(extract_polygon_lines(tapered_points))
+    extract_polygon_lines(all_lines, tapered_points)
 
     # Start x position after the tapered shape
     x_pos = taper_width
@@ -416,40 +497,91 @@ def create_connected_rectangles_svg(width, length, height, material_thickness=3,
         # extend their height by material_thickness at top and bottom and adjust top/bottom rectangles
         if i == 1 or i == 3:  # Second or fourth rectangle (length rectangles)
             # Top rectangle - narrower by inset on each side and moved up by material_thickness
-            all_lines.extend(extract_rectangle_lines(
-                x_pos + inset, y_top - material_thickness, column_width - 2 * inset, small_height
-            ))
+            extract_rectangle_lines(
+                all_lines, x_pos + inset, y_top - material_thickness, column_width - 2 * inset, small_height
+            )
 
             # Middle rectangle - extended by material_thickness at top and bottom
-            all_lines.extend(extract_rectangle_lines(
-                x_pos, y_middle - material_thickness, column_width, adjusted_height + 2 * material_thickness
-            ))
+            extract_rectangle_lines(
+                all_lines, x_pos, y_middle - material_thickness, column_width, adjusted_height + 2 * material_thickness
+            )
 
             # Bottom rectangle - narrower by inset on each side and moved down by material_thickness
-            all_lines.extend(extract_rectangle_lines(
-                x_pos + inset, y_bottom + material_thickness, column_width - 2 * inset, small_height
-            ))
+            extract_rectangle_lines(
+                all_lines, x_pos + inset, y_bottom + material_thickness, column_width - 2 * inset, small_height
+            )
         else:  # First and third rectangle (width rectangles)
             # Top rectangle - narrower by inset on each side
-            all_lines.extend(extract_rectangle_lines(
-                x_pos + inset, y_top, column_width - 2 * inset, small_height
-            ))
+            extract_rectangle_lines(
+                all_lines, x_pos + inset, y_top, column_width - 2 * inset, small_height
+            )
 
             # Middle rectangle - normal height
-            all_lines.extend(extract_rectangle_lines(
-                x_pos, y_middle, column_width, adjusted_height
-            ))
+            extract_rectangle_lines(
+                all_lines, x_pos, y_middle, column_width, adjusted_height
+            )
 
             # Bottom rectangle - narrower by inset on each side
-            all_lines.extend(extract_rectangle_lines(
-                x_pos + inset, y_bottom, column_width - 2 * inset, small_height
-            ))
+            extract_rectangle_lines(
+                all_lines, x_pos + inset, y_bottom, column_width - 2 * inset, small_height
+            )
 
         # Update x position for next column
         x_pos += column_width
 
-    # Find overlapping and non-overlapping segments
-    unique_segments, overlap_segments = find_overlapping_segments(all_lines)
+    return all_lines
+
+
+# Resolution of the SVG cache key; must be a power of ten. Dimension changes smaller
+# than this cannot visibly affect the pattern, so they reuse the cached SVG.
+_CACHE_QUANTUM = 1e-3
+_CACHE_DIGITS = round(-math.log10(_CACHE_QUANTUM))  # Decimal places kept by round()
+
+
+@functools.lru_cache(maxsize=32, typed=True)
+def _compute_svg_content(width, length, height, material_thickness, flap_length, detect_overlaps):
+    """
+    Build the SVG document for a box; see create_connected_rectangles_svg for the arguments.
+
+    Returns:
+        tuple: (SVG content, total width, total height)
+    """
+    # Adjust dimensions to account for material thickness
+    # For internal dimensions to match input, we need to add material thickness to external dimensions
+    adjusted_width = width + material_thickness
+    adjusted_length = length + material_thickness
+    adjusted_height = height + material_thickness
+
+    # Calculate the height for the top and bottom rectangles
+    small_height = min(adjusted_width, adjusted_length, adjusted_height) / 2
+
+    # Tapered shape dimensions
+    taper_width = flap_length  # Use the flap_length parameter (default is 15mm)
+    taper_angle = 30  # degrees
+
+    # Calculate the height difference for the taper (both top and bottom)
+    taper_height_diff = taper_width * math.tan(math.radians(taper_angle))
+
+    # Calculate total width and height of the SVG
+    total_width = 2 * adjusted_width + 2 * adjusted_length + taper_width
+    total_height = adjusted_height + 2 * small_height + 2 * material_thickness  # Increased for the shifted rectangles
+
+    # Define the column widths and positions
+    column_widths = [adjusted_width, adjusted_length, adjusted_width, adjusted_length]
+
+    half_taper = taper_height_diff / 2  # Half the taper amount for top and bottom
+
+    if detect_overlaps:
+        # Explode every shape into its edges and let overlap detection find the shared ones
+        all_lines = _exploded_box_lines(column_widths, small_height, adjusted_height, material_thickness,
+                                        taper_width, half_taper)
+        unique_segments, fold_segments = find_overlapping_segments(all_lines)
+        path_data = " ".join(_PATH_SEGMENT % (line.x1, line.y1, line.x2, line.y2) for line in unique_segments)
+    else:
+        # Trace the cut outline and the fold lines directly from the box geometry
+        outline_points, closed, fold_segments = _box_outline(column_widths, small_height, adjusted_height,
+                                                             material_thickness, taper_width, half_taper)
+        path_data = "M " + " L ".join("%s,%s" % point for point in outline_points) + (" Z" if closed else "")
 
     # Create SVG with line highlighting
     svg_header = f'''<?xml version="1.0" encoding="UTF-8" standalone="no"?>
@@ -459,18 +591,11 @@ def create_connected_rectangles_svg(width, length, height, material_thickness=3,
     # Create SVG elements
     svg_elements = []
 
-    # Create a single path for all black (non-overlapping) lines
-    if unique_segments:
-        path_data = []
-        for line in unique_segments:
-            path_data.append(f"M {line.x1},{line.y1} L {line.x2},{line.y2}")
+    # Create a single path for all black (cut) lines
+    svg_elements.append(f'  <path d="{path_data}" fill="none" stroke="black" stroke-width="0.5"/>')
 
-        # Join all path data into a single path element
-        svg_elements.append(f'  <path d="{" ".join(path_data)}" fill="none" stroke="black" stroke-width="0.5"/>')
-
-    # Keep green (overlapping) lines as individual line elements
-    for line in overlap_segments:
-        svg_elements.append("  " + line.to_svg("green", 1.0))
+    # Keep green (fold) lines as individual line elements
+    svg_elements.extend(_GREEN_LINE % (line.x1, line.y1, line.x2, line.y2) for line in fold_segments)
 
     # SVG footer
     svg_footer = '</svg>'
@@ -478,6 +603,32 @@ def create_connected_rectangles_svg(width, length, height, material_thickness=3,
     # Combine all parts
     svg_content = svg_header + '\n' + '\n'.join(svg_elements) + '\n' + svg_footer
 
+    return svg_content, total_width, total_height
+
+
+def create_connected_rectangles_svg(width, length, height, material_thickness=3, flap_length=15,
+                                    filename="connected_rectangles.svg", detect_overlaps=False):
+    """
+    Creates an SVG file with 4 rectangles connected left to right, plus additional
+    rectangles above and below each one. Also adds a tapered shape to the left.
+
+    Args:
+        width (float): Internal width dimension in millimeters
+        length (float): Internal length dimension in millimeters
+        height (float): Internal height dimension in millimeters (used for the middle row)
+        material_thickness (float): Material thickness in millimeters
+        flap_length (float): Length of the tapered flap in millimeters
+        filename (str): Output filename for the SVG file
+        detect_overlaps (bool): Find the fold lines by running overlap detection on every
+            rectangle edge instead of computing the outline directly (the old behavior)
+    """
+    # Inputs closer together than _CACHE_QUANTUM share a cached result. The cache is typed,
+    # so ints and floats keep their own entries and format the same way as without it.
+    svg_content, total_width, total_height = _compute_svg_content(
+        round(width, _CACHE_DIGITS), round(length, _CACHE_DIGITS), round(height, _CACHE_DIGITS),
+        round(material_thickness, _CACHE_DIGITS), round(flap_length, _CACHE_DIGITS), detect_overlaps
+    )
+
     # Write the SVG content to a file
     with open(filename, 'w') as f:
         f.write(svg_content)